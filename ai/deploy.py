@@ -1,17 +1,128 @@
 import requests
 import base64
+import hashlib
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+
+
+def _git_blob_sha(data: bytes) -> str:
+    """Compute the SHA git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
 
 
 class GitHubDeployer:
     def __init__(self, token: Optional[str] = None):
         self.token = token
         self.timeout = 10  # seconds
+        self.max_workers = 8  # GitHub discourages heavy concurrent writes
+        self._username: Optional[str] = None
+        self._default_branches: Dict[str, str] = {}  # repo name -> default branch
+
+        # One keep-alive session for every API call (avoids a TLS handshake per request)
+        self._session = requests.Session()
+        self._session.headers.update({"Accept": "application/vnd.github+json"})
+        if token:
+            self._session.headers.update({"Authorization": f"token {token}"})
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
 
     def token_available(self) -> bool:
         return bool(self.token)
 
+    def _get_username(self) -> str:
+        """Return the authenticated user's login, fetching it once per deployer."""
+        if self._username:
+            return self._username
+
+        try:
+            user_resp = self._session.get(
+                "https://api.github.com/user",
+                timeout=self.timeout
+            )
+            user_resp.raise_for_status()
+            username = user_resp.json().get("login")
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Failed to authenticate with GitHub API: {str(e)}")
+        except (KeyError, ValueError) as e:
+            raise RuntimeError(f"Invalid response from GitHub API: {str(e)}")
+
+        if not username:
+            raise RuntimeError("Could not retrieve GitHub username from API response.")
+
+        self._username = username
+        return username
+
+    def _create_blob(self, repo_api: str, file_path: str, data: bytes) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Upload a single file as a git blob.
+
+        Returns:
+            Tuple of (file_path, blob_sha, error) - exactly one of blob_sha/error is set
+        """
+        try:
+            # Encode content to base64
+            encoded_content = base64.b64encode(data).decode("ascii")
+
+            blob_resp = self._session.post(
+                f"{repo_api}/git/blobs",
+                json={"content": encoded_content, "encoding": "base64"},
+                timeout=self.timeout
+            )
+
+            if blob_resp.status_code == 201:
+                return file_path, blob_resp.json().get("sha"), None
+            return file_path, None, f"{file_path}: {blob_resp.status_code}"
+        except requests.exceptions.RequestException as e:
+            return file_path, None, f"{file_path}: Network error - {str(e)}"
+        except Exception as e:
+            return file_path, None, f"{file_path}: {str(e)}"
+
+    def _get_branch_head(self, repo_api: str, branch: str) -> Tuple[str, str, Dict[str, str]]:
+        """
+        Resolve the branch head commit and its tree, bootstrapping empty repositories.
+
+        Returns:
+            Tuple of (commit_sha, tree_sha, {path: blob_sha}) for the current head
+        """
+        ref_url = f"{repo_api}/git/ref/heads/{branch}"
+        ref_resp = self._session.get(ref_url, timeout=self.timeout)
+
+        if ref_resp.status_code in [404, 409]:
+            # The Git Data API does not work on empty repos - create an initial commit first
+            # (no "branch" given, so it lands on the repository's default branch)
+            init_resp = self._session.put(
+                f"{repo_api}/contents/README.md",
+                json={
+                    "message": "Initial commit",
+                    "content": base64.b64encode(b"# Website\n").decode(),
+                },
+                timeout=self.timeout
+            )
+            if init_resp.status_code not in [200, 201]:
+                raise RuntimeError(
+                    f"Failed to initialize repository: {init_resp.status_code} - {init_resp.text}"
+                )
+            ref_resp = self._session.get(ref_url, timeout=self.timeout)
+
+        if ref_resp.status_code != 200:
+            raise RuntimeError(f"Failed to read branch '{branch}': {ref_resp.status_code} - {ref_resp.text}")
+
+        commit_sha = ref_resp.json()["object"]["sha"]
+
+        # One recursive listing gives the tree SHA and every existing blob SHA
+        tree_resp = self._session.get(
+            f"{repo_api}/git/trees/{commit_sha}",
+            params={"recursive": 1},
+            timeout=self.timeout
+        )
+        if tree_resp.status_code != 200:
+            raise RuntimeError(f"Failed to read tree for {commit_sha}: {tree_resp.status_code}")
+
+        tree = tree_resp.json()
+        sha_by_path = {e["path"]: e["sha"] for e in tree.get("tree", []) if e.get("type") == "blob"}
+        return commit_sha, tree["sha"], sha_by_path
+
     def deploy_to_github_pages(self, repo_name: str, files: Dict[str, str], make_public: bool = True) -> Dict:
         """
         Deploy website files to GitHub Pages.
@@ -30,112 +141,128 @@ class GitHubDeployer:
         if not self.token:
             raise RuntimeError("GitHub token missing. Please provide a valid GitHub token.")
 
+        if not files:
+            raise RuntimeError("No files to deploy.")
+
         # 1. Sanitize Repo Name
         repo_name = repo_name.strip()
         if "/" in repo_name:
             repo_name = repo_name.rstrip("/").split("/")[-1]
         repo_name = repo_name.replace(" ", "-").replace("_", "-")
 
-        headers = {
-            "Authorization": f"token {self.token}",
-            "Accept": "application/vnd.github+json",
-        }
-
         # 2. Get the authenticated user's username
-        try:
-            user_resp = requests.get(
-                "https://api.github.com/user",
-                headers=headers,
-                timeout=self.timeout
-            )
-            user_resp.raise_for_status()
-            username = user_resp.json().get("login")
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Failed to authenticate with GitHub API: {str(e)}")
-        except (KeyError, ValueError) as e:
-            raise RuntimeError(f"Invalid response from GitHub API: {str(e)}")
-
-        if not username:
-            raise RuntimeError("Could not retrieve GitHub username from API response.")
-
-        # 3. Create repo (or verify it exists)
-        try:
-            repo_resp = requests.post(
-                "https://api.github.com/user/repos",
-                headers=headers,
-                json={"name": repo_name, "private": not make_public, "auto_init": True},
-                timeout=self.timeout
-            )
+        username = self._get_username()
 
-            if repo_resp.status_code == 201:
-                repo_name = repo_resp.json().get("name", repo_name)
-            elif repo_resp.status_code == 422:
-                # Repo already exists - verify we can access it
-                check_url = f"https://api.github.com/repos/{username}/{repo_name}"
-                check_resp = requests.get(check_url, headers=headers, timeout=self.timeout)
+        # 3. Create repo (or verify it exists) - skipped for repos this deployer already resolved
+        branch = self._default_branches.get(repo_name)
+        if branch is None:
+            try:
+                repo_resp = self._session.post(
+                    "https://api.github.com/user/repos",
+                    json={"name": repo_name, "private": not make_public, "auto_init": True},
+                    timeout=self.timeout
+                )
 
-                if check_resp.status_code != 200:
+                if repo_resp.status_code == 201:
+                    repo_info = repo_resp.json()
+                    repo_name = repo_info.get("name", repo_name)
+                    branch = repo_info.get("default_branch") or "main"
+                elif repo_resp.status_code == 422:
+                    # Repo already exists - look it up for its default branch
+                    check_resp = self._session.get(
+                        f"https://api.github.com/repos/{username}/{repo_name}",
+                        timeout=self.timeout
+                    )
+                    if check_resp.status_code != 200:
+                        raise RuntimeError(
+                            f"Repo '{repo_name}' does not exist and cannot be created: {repo_resp.text}"
+                        )
+                    branch = check_resp.json().get("default_branch") or "main"
+                else:
+                    if repo_resp.status_code == 401:
+                        # Token was revoked or replaced - look the user up again next time
+                        self._username = None
                     raise RuntimeError(
-                        f"Cannot create or access repository '{repo_name}'. "
-                        f"GitHub API error: {repo_resp.json().get('message', repo_resp.text)}"
+                        f"Failed to create repository: {repo_resp.status_code} - {repo_resp.text}"
                     )
-            else:
-                raise RuntimeError(
-                    f"Failed to create repository: {repo_resp.status_code} - {repo_resp.text}"
-                )
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Network error during repo creation: {str(e)}")
-
-        # 4. Upload files
-        uploaded_count = 0
-        failed_files = []
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"Network error during repo creation: {str(e)}")
+            self._default_branches[repo_name] = branch
 
-        for file_path, content in files.items():
+        # 4. Push all files as a single commit (blobs -> tree -> commit -> ref update)
+        repo_api = f"https://api.github.com/repos/{username}/{repo_name}"
+        try:
             try:
-                file_url = f"https://api.github.com/repos/{username}/{repo_name}/contents/{file_path}"
+                base_commit, base_tree, sha_by_path = self._get_branch_head(repo_api, branch)
+            except RuntimeError:
+                # The repo may have been deleted or changed since it was cached - look it up again next time
+                self._default_branches.pop(repo_name, None)
+                raise
 
-                # Check if file exists
-                try:
-                    get_resp = requests.get(file_url, headers=headers, timeout=self.timeout)
-                    sha = get_resp.json().get("sha") if get_resp.status_code == 200 else None
-                except (ValueError, KeyError):
-                    sha = None
+            # Encode each file once; the bytes feed both the SHA check and the upload
+            encoded = {path: content.encode("utf-8") for path, content in files.items()}
 
-                # Encode content to base64
-                encoded_content = base64.b64encode(content.encode("utf-8")).decode()
+            # Files whose content already matches the branch head need no upload
+            changed = {
+                path: data for path, data in encoded.items()
+                if sha_by_path.get(path) != _git_blob_sha(data)
+            }
 
-                data = {
-                    "message": f"Add {file_path}",
-                    "content": encoded_content,
-                }
-                if sha:
-                    data["sha"] = sha
+            # Blob uploads are independent network-bound requests, so run them concurrently
+            with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+                results = list(ex.map(lambda kv: self._create_blob(repo_api, *kv), changed.items()))
 
-                put_resp = requests.put(file_url, headers=headers, json=data, timeout=self.timeout)
+            tree_entries = [
+                {"path": path, "mode": "100644", "type": "blob", "sha": sha}
+                for path, sha, _ in results if sha
+            ]
+            failed_files = [err for _, _, err in results if err]
 
-                if put_resp.status_code in [200, 201]:
-                    uploaded_count += 1
-                else:
-                    failed_files.append(f"{file_path}: {put_resp.status_code}")
-            except requests.exceptions.RequestException as e:
-                failed_files.append(f"{file_path}: Network error - {str(e)}")
-            except Exception as e:
-                failed_files.append(f"{file_path}: {str(e)}")
+            if changed and not tree_entries:
+                raise RuntimeError(
+                    f"All file uploads failed. Details: {'; '.join(failed_files)}"
+                )
 
-        if uploaded_count == 0:
-            raise RuntimeError(
-                f"All file uploads failed. Details: {'; '.join(failed_files)}"
-            )
+            # Nothing changed since the last deploy - skip the commit entirely
+            if tree_entries:
+                tree_resp = self._session.post(
+                    f"{repo_api}/git/trees",
+                    json={"base_tree": base_tree, "tree": tree_entries},
+                    timeout=self.timeout
+                )
+                if tree_resp.status_code != 201:
+                    raise RuntimeError(f"Failed to create tree: {tree_resp.status_code} - {tree_resp.text}")
+
+                commit_resp = self._session.post(
+                    f"{repo_api}/git/commits",
+                    json={
+                        "message": f"Deploy {len(tree_entries)} files",
+                        "tree": tree_resp.json()["sha"],
+                        "parents": [base_commit],
+                    },
+                    timeout=self.timeout
+                )
+                if commit_resp.status_code != 201:
+                    raise RuntimeError(f"Failed to create commit: {commit_resp.status_code} - {commit_resp.text}")
+
+                ref_resp = self._session.patch(
+                    f"{repo_api}/git/refs/heads/{branch}",
+                    json={"sha": commit_resp.json()["sha"]},
+                    timeout=self.timeout
+                )
+                if ref_resp.status_code != 200:
+                    raise RuntimeError(f"Failed to update branch: {ref_resp.status_code} - {ref_resp.text}")
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"Network error during upload: {str(e)}")
 
         if failed_files:
             print(f"Warning: {len(failed_files)} files failed to upload: {failed_files}")
 
         # 5. Enable GitHub Pages (Best effort)
         try:
-            pages_resp = requests.post(
-                f"https://api.github.com/repos/{username}/{repo_name}/pages",
-                headers=headers,
-                json={"source": {"branch": "main", "path": "/"}},
+            pages_resp = self._session.post(
+                f"{repo_api}/pages",
+                json={"source": {"branch": branch, "path": "/"}},
                 timeout=self.timeout
             )
             # Pages might already be enabled (409 Conflict is ok)
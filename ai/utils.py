@@ -6,6 +6,7 @@ import json
 import streamlit as st
 import google.generativeai as genai
 import io
+import re
 import zipfile
 
 
@@ -14,42 +15,55 @@ genai.configure(api_key=API_KEY)
 
 DEFAULT_MODEL = "gemini-2.5-flash"
 
+# Every call expects a {filename: content} object back
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+SYSTEM_PROMPT = """
+You are an AI website generator.
+Respond ONLY with valid JSON. No explanations.
+
+JSON format:
+{
+ "index.html": "...",
+ "styles.css": "...",
+ "script.js": "...",
+ "backend.py": "..." (optional)
+}
+
+Rules:
+- Do NOT write markdown.
+- Do NOT write extra text.
+- MUST return pure JSON.
+"""
+
+EDIT_PROMPT = """
+Modify these website files according to the user's message.
+
+User message:
+{user_msg}
+
+Current files:
+{files_json}
+
+Return ONLY JSON of updated files.
+"""
+
+_HEAD_CLOSE_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+_BODY_CLOSE_RE = re.compile(r"</body\s*>", re.IGNORECASE)
+
 # -----------------------------------------------------
-# Force valid JSON from Gemini output
+# Parse JSON from Gemini output
 # -----------------------------------------------------
 def force_json(text):
     """
-    Gemini sometimes outputs JSON with extra words or markdown.
-    This function extracts and fixes JSON safely.
+    Parse a Gemini response generated in JSON mode.
+    response_mime_type="application/json" guarantees bare JSON,
+    so no markdown/extra-text sanitizing is needed.
     """
-    text = text.strip()
-
-    # Try direct JSON
     try:
         return json.loads(text)
-    except:
-        pass
-
-    # Remove code fences
-    if "```" in text:
-        text = text.split("```")[1]
-        text = text.replace("json", "").strip()
-        try:
-            return json.loads(text)
-        except:
-            pass
-
-    # Extract JSON manually using first '{' to last '}'
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1:
-        try:
-            extracted = text[start:end+1]
-            return json.loads(extracted)
-        except:
-            pass
-
-    raise ValueError("Gemini returned invalid JSON:\n" + text)
+    except ValueError:
+        raise ValueError("Gemini returned invalid JSON:\n" + text) from None
 
 
 # -----------------------------------------------------
@@ -58,37 +72,31 @@ def force_json(text):
 class WebsiteGenerator:
     def __init__(self, model="auto"):
         self.model = DEFAULT_MODEL if model == "auto" else model
+        self._genai_model = genai.GenerativeModel(
+            self.model,
+            system_instruction=SYSTEM_PROMPT,
+            generation_config=JSON_GENERATION_CONFIG,
+        )
 
     # ------------------------------
     # Main AI call
     # ------------------------------
     def _call_ai(self, prompt):
-        system = """
-You are an AI website generator.
-Respond ONLY with valid JSON. No explanations.
+        full_prompt = "User Request:\n" + prompt
 
-JSON format:
-{
- "index.html": "...",
- "styles.css": "...",
- "script.js": "...",
- "backend.py": "..." (optional)
-}
-
-Rules:
-- Do NOT write markdown.
-- Do NOT write extra text.
-- MUST return pure JSON.
-"""
-
-        full_prompt = system + "\nUser Request:\n" + prompt
-
-        model = genai.GenerativeModel(self.model)
-        response = model.generate_content(full_prompt)
+        response = self._genai_model.generate_content(full_prompt)
 
         text = response.text
         return force_json(text)
 
+    def _stream_ai(self, prompt):
+        """Yield response text chunks as Gemini produces them (parse the joined text with force_json)."""
+        full_prompt = "User Request:\n" + prompt
+
+        for chunk in self._genai_model.generate_content(full_prompt, stream=True):
+            if chunk.parts:
+                yield chunk.text
+
     # ------------------------------
     # Public method
     # ------------------------------
@@ -96,22 +104,22 @@ Rules:
         files = self._call_ai(prompt)
         return {"files": files}
 
+    def generate_website_stream(self, prompt):
+        return self._stream_ai(prompt)
+
     # ------------------------------
     # Chat-based editing
     # ------------------------------
     def edit_files(self, user_msg, current_files):
-        prompt = f"""
-Modify these website files according to the user's message.
+        return self._call_ai(self._edit_prompt(user_msg, current_files))
 
-User message:
-{user_msg}
+    def edit_files_stream(self, user_msg, current_files):
+        return self._stream_ai(self._edit_prompt(user_msg, current_files))
 
-Current files:
-{json.dumps(current_files, indent=2)}
-
-Return ONLY JSON of updated files.
-"""
-        return self._call_ai(prompt)
+    def _edit_prompt(self, user_msg, current_files):
+        # Compact separators: indentation whitespace is just extra prompt tokens
+        files_json = json.dumps(current_files, separators=(",", ":"), ensure_ascii=False)
+        return EDIT_PROMPT.format(user_msg=user_msg, files_json=files_json)
 
     # ------------------------------
     # Live preview
@@ -121,6 +129,18 @@ Return ONLY JSON of updated files.
         css = files.get("styles.css", "")
         js = files.get("script.js", "")
 
+        # index.html is usually a full document - splice CSS/JS in with a single join
+        head = _HEAD_CLOSE_RE.search(html)
+        body = _BODY_CLOSE_RE.search(html, head.end()) if head else None
+        if head and body:
+            return "".join([
+                html[:head.start()],
+                f"<style>{css}</style>",
+                html[head.start():body.start()],
+                f"<script>{js}</script>",
+                html[body.start():],
+            ])
+
         return f"""
 <!doctype html>
 <html>
@@ -141,7 +161,8 @@ Return ONLY JSON of updated files.
 # -----------------------------------------------------
 def create_zip_bytes(files: dict) -> bytes:
     buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+    # Generated sites are a few small text files - fastest deflate level is plenty
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
         for name, content in files.items():
             z.writestr(name, content.encode("utf-8"))
     buf.seek(0)
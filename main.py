@@ -1,32 +1,45 @@
 # main.py
 import streamlit as st
+import gc
 import os
 import base64
-from datetime import datetime
-from ai.utils import WebsiteGenerator, create_zip_bytes
-from ai.deploy import GitHubDeployer
+import html
+from collections import deque
+from ai.utils import WebsiteGenerator, create_zip_bytes, force_json
 
 # -------------------------------------------------------
 # 1. Configuration & Page Icon Logic
 # -------------------------------------------------------
-page_icon = "⚡"
-if os.path.exists("images"):
-    valid_exts = [".png", ".jpg", ".jpeg", ".ico", ".svg"]
-    for file in os.listdir("images"):
-        if any(file.lower().endswith(ext) for ext in valid_exts):
-            page_icon = os.path.join("images", file)
-            break
+# Reruns allocate lots of short-lived objects; collect young generations far less often.
+# Older generations keep their defaults so full collections aren't delayed for the whole
+# server process. (gc.disable() would leak cycles, since every session shares it.)
+gc.set_threshold(50000, 10, 10)
+
+ICON_EXTS = frozenset({".png", ".jpg", ".jpeg", ".ico", ".svg"})
+
+
+@st.cache_resource(show_spinner=False)
+def find_page_icon():
+    # The images folder doesn't change while the app runs - scan it once per process
+    if os.path.isdir("images"):
+        with os.scandir("images") as entries:
+            return next(
+                (e.path for e in entries if os.path.splitext(e.name)[1].lower() in ICON_EXTS),
+                "⚡"
+            )
+    return "⚡"
+
 
 st.set_page_config(
     page_title="NexaBuild",
-    page_icon=page_icon,
+    page_icon=find_page_icon(),
     layout="wide",
     initial_sidebar_state="collapsed"
 )
 
 
-def load_custom_css():
-    st.markdown("""
+# Static stylesheet - a compile-time constant, so reruns never rebuild it
+CUSTOM_CSS = """
     <style>
         /* --- Global Variables --- */
         :root {
@@ -158,26 +171,92 @@ def load_custom_css():
             margin-bottom: 20px;
         }
 
+        /* --- Chat History --- */
+        .chat-msg {
+            padding: 10px 14px;
+            border-radius: 8px;
+            margin-bottom: 10px;
+            font-size: 0.9rem;
+        }
+        .chat-user {
+            background: rgba(0, 243, 255, 0.08);
+            border-left: 3px solid var(--neon-cyan);
+        }
+        .chat-ai {
+            background: rgba(188, 19, 254, 0.08);
+            border-left: 3px solid var(--neon-purple);
+        }
+
         /* --- Sidebar --- */
         [data-testid="stSidebar"] {
             background-color: #010409;
             border-right: 1px solid #30363d;
         }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+
+def load_custom_css():
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
 load_custom_css()
 
+
+# -------------------------------------------------------
+# Shared Clients (reused across reruns)
+# -------------------------------------------------------
+@st.cache_resource(max_entries=4)
+def get_generator(model="auto"):
+    return WebsiteGenerator(model=model)
+
+
+def get_deployer(token):
+    # Imported lazily: most sessions never deploy, so skip loading requests/ai.deploy at startup
+    from ai.deploy import GitHubDeployer
+
+    # Kept per session (not process-wide) so the user's token goes away with their session
+    deployer = st.session_state.get("deployer")
+    if deployer is None or deployer.token != token:
+        deployer = GitHubDeployer(token)
+        st.session_state.deployer = deployer
+    return deployer
+
+
+def stream_json(chunks):
+    """Show model output live while it streams in, then return it parsed as JSON."""
+    placeholder = st.empty()
+    parts = []
+    tail = ""
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            # Only the tail is re-sent per chunk so updates stay small for large sites
+            tail = (tail + chunk)[-2000:]
+            placeholder.code(tail, language="json")
+        return force_json("".join(parts))
+    finally:
+        # Clear the partial output even when streaming or parsing fails
+        placeholder.empty()
+
+
+@st.cache_data(max_entries=4)
+def project_zip(files_items):
+    """ZIP bytes for a (sorted) tuple of file items; rebuilt only when files change."""
+    return create_zip_bytes(dict(files_items))
+
 # -------------------------------------------------------
 # 2. Session State
 # -------------------------------------------------------
+CHAT_MAX_MESSAGES = 50  # older messages are dropped from session state
+CHAT_HISTORY_LIMIT = 20  # messages shown in the sidebar
+
 if "page" not in st.session_state:
     st.session_state.page = "home"
 if "files" not in st.session_state:
     st.session_state.files = {}
 if "chat" not in st.session_state:
-    st.session_state.chat = []
+    st.session_state.chat = deque(maxlen=CHAT_MAX_MESSAGES)
 if "view_mode" not in st.session_state:
     st.session_state.view_mode = "Preview"
 
@@ -185,14 +264,16 @@ if "view_mode" not in st.session_state:
 # -------------------------------------------------------
 # 3. Global Components (Header/Footer)
 # -------------------------------------------------------
-def render_header():
+@st.cache_resource(show_spinner=False)
+def load_logo_html():
     # Default text logo
     logo_html = "⚡ NexaBuild"
 
     # Check for logo in images directory
-    if os.path.exists("images"):
+    if os.path.isdir("images"):
         # Find any file starting with 'logo' (e.g., logo.png, logo.jpg)
-        logo_file = next((f for f in os.listdir("images") if f.lower().startswith("logo.")), None)
+        with os.scandir("images") as entries:
+            logo_file = next((e.name for e in entries if e.name.lower().startswith("logo.")), None)
 
         if logo_file:
             try:
@@ -207,9 +288,13 @@ def render_header():
             except Exception as e:
                 print(f"Error loading logo: {e}")
 
+    return logo_html
+
+
+def render_header():
     st.markdown(f"""
     <div class="nav-container">
-        <div class="nav-logo">{logo_html}</div>
+        <div class="nav-logo">{load_logo_html()}</div>
         <div class="nav-links">
             <a href="#">Home</a>
             <a href="#">Features</a>
@@ -220,30 +305,36 @@ def render_header():
     """, unsafe_allow_html=True)
 
 
-def render_footer():
-    st.markdown("""
+FOOTER_HTML = """
     <div class="footer-container">
         <p>Built with ❤️ using Gemini AI</p>
         <p>Need help? <a href="mailto:nexabuild@gmail.com" class="footer-link">Contact Support (nexabuild@gmail.com)</a></p>
         <p style="font-size: 0.8rem; color: #666; margin-top: 10px;">© 2025 NexaBuild. All rights reserved.</p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+
+def render_footer():
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 
 # -------------------------------------------------------
 # 4. Page: Home
 # -------------------------------------------------------
+# Spacer, title and tagline in one element instead of three
+HERO_HTML = (
+    "<div style='height: 50px;'></div>"
+    "<h1 style='text-align: center; font-size: 3rem;'>Build Your Dream Website</h1>"
+    "<p style='text-align: center; font-size: 1.1rem; margin-bottom: 30px;'>Enter a prompt, and let our AI write the code for you.</p>"
+)
+
+
 def render_home():
     render_header()
 
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.markdown("<div style='height: 50px;'></div>", unsafe_allow_html=True)
-        st.markdown("<h1 style='text-align: center; font-size: 3rem;'>Build Your Dream Website</h1>",
-                    unsafe_allow_html=True)
-        st.markdown(
-            "<p style='text-align: center; font-size: 1.1rem; margin-bottom: 30px;'>Enter a prompt, and let our AI write the code for you.</p>",
-            unsafe_allow_html=True)
+        st.markdown(HERO_HTML, unsafe_allow_html=True)
 
         st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
         st.markdown("### ⌨️ What do you want to build?")
@@ -266,10 +357,10 @@ def render_home():
         if submitted and prompt:
             with st.spinner("🤖 Analyzing requirements & writing code..."):
                 try:
-                    gen = WebsiteGenerator(model="gemini-2.5-flash")
-                    result = gen.generate_website(prompt)
+                    gen = get_generator("gemini-2.5-flash")
+                    files = stream_json(gen.generate_website_stream(prompt))
 
-                    st.session_state.files = result["files"]
+                    st.session_state.files = files
                     st.session_state.chat.append(("user", prompt))
                     st.session_state.chat.append(("ai", "I've created the first version. Check the 'Preview' tab!"))
                     st.session_state.page = "workspace"
@@ -283,6 +374,90 @@ def render_home():
 # -------------------------------------------------------
 # 5. Page: Workspace
 # -------------------------------------------------------
+@st.fragment
+def render_preview():
+    # Fragment: reruns scoped to other fragments (e.g. chat) don't re-ship the iframe
+    st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
+    html_preview = get_generator().combine_to_html(st.session_state.files)
+    st.components.v1.html(html_preview, height=750, scrolling=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@st.fragment
+def render_chat():
+    # Fragment: submitting a message reruns only the chat; a full rerun follows once files change
+    st.markdown("### 💬 AI Assistant")
+
+    # Chat History (only the latest messages, emitted as one element so render cost stays flat)
+    messages = []
+    for role, msg in list(st.session_state.chat)[-CHAT_HISTORY_LIMIT:]:
+        icon = "👤" if role == "user" else "🤖"
+        text = html.escape(msg).replace("\n", "<br>")
+        messages.append(f'<div class="chat-msg chat-{role}">{icon} {text}</div>')
+    if messages:
+        st.markdown("".join(messages), unsafe_allow_html=True)
+
+    # Chat Input
+    st.markdown("---")
+    user_input = st.chat_input("Type changes here (e.g., 'Make bg blue')...")
+    if user_input:
+        st.session_state.chat.append(("user", user_input))
+        with st.spinner("Applying changes..."):
+            try:
+                gen = get_generator()
+                updated = stream_json(gen.edit_files_stream(user_input, st.session_state.files))
+                st.session_state.files = updated
+                st.session_state.chat.append(("ai", "Done! Preview updated."))
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+
+@st.fragment
+def render_code_editor():
+    # Fragment: switching files or typing reruns only the editor, not the preview/deploy tabs
+    col_list, col_editor = st.columns([1, 4])
+
+    with col_list:
+        st.markdown("##### Files")
+        selected_file = st.radio("Select File", list(st.session_state.files.keys()), label_visibility="collapsed")
+
+    with col_editor:
+        st.markdown(f"##### Editing: `{selected_file}`")
+
+        # One stable widget key for every file: switching files updates the value
+        # instead of tearing down and mounting a new text area
+        source = st.session_state.files[selected_file]
+        if ("code_editor" not in st.session_state
+                or st.session_state.get("editor_file") != selected_file
+                or st.session_state.get("editor_source") != source):
+            st.session_state.editor_file = selected_file
+            st.session_state.editor_source = source
+            st.session_state.code_editor = source
+
+        # This text area is styled by CSS to look like VS Code
+        new_code = st.text_area(
+            "Code Editor",
+            height=600,
+            label_visibility="collapsed",
+            key="code_editor"
+        )
+
+        if new_code != st.session_state.files[selected_file]:
+            if st.button(f"💾 Save Changes to {selected_file}"):
+                st.session_state.files[selected_file] = new_code
+                st.success("File Saved!")
+                st.rerun()
+
+
+DOWNLOAD_CARD_HTML = """
+        <div class="glass-card" style="border-left: 4px solid var(--neon-cyan);">
+            <h4>Download Source Code</h4>
+            <p>Get the full source code as a ZIP file to use locally or upload to Netlify/Vercel.</p>
+        </div>
+        """
+
+
 def render_workspace():
     render_header()
 
@@ -294,86 +469,35 @@ def render_workspace():
         if st.button("🏠 Exit"):
             st.session_state.page = "home"
             st.session_state.files = {}
-            st.session_state.chat = []
+            st.session_state.chat = deque(maxlen=CHAT_MAX_MESSAGES)
+            st.session_state.pop("deployer", None)
             st.rerun()
 
     st.markdown("---")
 
     # Sidebar Chat
     with st.sidebar:
-        st.markdown("### 💬 AI Assistant")
-
-        # Chat History
-        for role, msg in st.session_state.chat:
-            if role == "user":
-                st.info(f"👤 {msg}")
-            else:
-                st.success(f"🤖 {msg}")
-
-        # Chat Input
-        st.markdown("---")
-        user_input = st.chat_input("Type changes here (e.g., 'Make bg blue')...")
-        if user_input:
-            st.session_state.chat.append(("user", user_input))
-            with st.spinner("Applying changes..."):
-                try:
-                    gen = WebsiteGenerator()
-                    updated = gen.edit_files(user_input, st.session_state.files)
-                    st.session_state.files = updated
-                    st.session_state.chat.append(("ai", "Done! Preview updated."))
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+        render_chat()
 
     # Main Area
     tab_preview, tab_code, tab_deploy = st.tabs(["👁️ Preview", "💻 Code Editor", "🚀 Export & Deploy"])
 
     # TAB 1: PREVIEW
     with tab_preview:
-        st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
-        gen = WebsiteGenerator()
-        html_preview = gen.combine_to_html(st.session_state.files)
-        st.components.v1.html(html_preview, height=750, scrolling=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        render_preview()
 
     # TAB 2: CODE EDITOR (VS Code Style)
     with tab_code:
-        col_list, col_editor = st.columns([1, 4])
-
-        with col_list:
-            st.markdown("##### Files")
-            selected_file = st.radio("Select File", list(st.session_state.files.keys()), label_visibility="collapsed")
-
-        with col_editor:
-            st.markdown(f"##### Editing: `{selected_file}`")
-            # This text area is styled by CSS to look like VS Code
-            new_code = st.text_area(
-                "Code Editor",
-                value=st.session_state.files[selected_file],
-                height=600,
-                label_visibility="collapsed",
-                key=f"editor_{selected_file}"
-            )
-
-            if new_code != st.session_state.files[selected_file]:
-                if st.button(f"💾 Save Changes to {selected_file}"):
-                    st.session_state.files[selected_file] = new_code
-                    st.success("File Saved!")
-                    st.rerun()
+        render_code_editor()
 
     # TAB 3: EXPORT / DEPLOY
     with tab_deploy:
         st.markdown("### 📦 Export Project")
 
         # Download Box
-        st.markdown("""
-        <div class="glass-card" style="border-left: 4px solid var(--neon-cyan);">
-            <h4>Download Source Code</h4>
-            <p>Get the full source code as a ZIP file to use locally or upload to Netlify/Vercel.</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(DOWNLOAD_CARD_HTML, unsafe_allow_html=True)
 
-        zip_bytes = create_zip_bytes(st.session_state.files)
+        zip_bytes = project_zip(tuple(sorted(st.session_state.files.items())))
         st.download_button(
             label="⬇️ Download ZIP Package",
             data=zip_bytes,
@@ -397,7 +521,7 @@ def render_workspace():
             else:
                 with st.spinner("Deploying..."):
                     try:
-                        deployer = GitHubDeployer(gh_token)
+                        deployer = get_deployer(gh_token)
                         res = deployer.deploy_to_github_pages(repo_name, st.session_state.files)
                         st.success(f"Live at: {res['url']}")
                         st.markdown(f"[Open Website]({res['url']})")